@@ -1,21 +1,15 @@
-import subprocess
-import time
-import os
+import electron_session as session
 
-# Start IDE
-proc = subprocess.Popen(
-    ['./node_modules/.bin/electron', '.'],
-    stdout=subprocess.PIPE,
-    stderr=subprocess.PIPE
-)
+# Start IDE (or reuse a session another script already launched)
+proc = session.attach_or_launch()
 
 # Wait for window
-time.sleep(4)
+session.wait_for_window()
 
 # Screenshot
-subprocess.run(['screencapture', '/tmp/kimi_ide_final.png'])
+session.capture_frame('/tmp/kimi_ide_final.png', region=session.get_window_bounds())
 print("Screenshot saved: /tmp/kimi_ide_final.png")
 
-# Kill
-proc.terminate()
-time.sleep(1)
+# Kill only what we launched ourselves
+if proc is not None:
+    session.shutdown(proc)
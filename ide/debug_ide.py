@@ -1,100 +1,186 @@
 #!/usr/bin/env python3
-import subprocess
-import time
+import asyncio
+import json
+import mmap
+import signal
 import os
-from datetime import datetime
+import time
+from itertools import count
+from urllib.request import urlopen
+
+import electron_session as session
 
 # Create screenshots directory
 os.makedirs('debug_screenshots', exist_ok=True)
 
+# Monotonic frame counter; cheaper than a strftime call per frame and
+# keeps filenames unique even when two frames land in the same second
+_frame_counter = count(1)
+
 def take_screenshot(name):
-    """Take screenshot using macOS screencapture"""
-    timestamp = datetime.now().strftime('%H%M%S')
-    filename = f'debug_screenshots/{name}_{timestamp}.png'
-    subprocess.run(['screencapture', '-x', filename])
+    """Take screenshot of the IDE window (full screen if not found)"""
+    filename = f'debug_screenshots/{name}_{next(_frame_counter):03d}.jpg'
+    session.capture_frame(filename, region=session.get_window_bounds())
     print(f"📸 Screenshot saved: {filename}")
     return filename
 
+# Byte offset of the last check, so each call only reads what's new
+_log_offset = 0
+
 def check_console_log():
-    """Check if there's a console log file"""
+    """Print console output appended since the previous check"""
+    global _log_offset
     log_file = 'electron_console.log'
     if os.path.exists(log_file):
         with open(log_file, 'r') as f:
+            f.seek(_log_offset)
             content = f.read()
+            _log_offset = f.tell()
             if content:
                 print("\n📝 Console output:")
                 print(content[-2000:])  # Last 2000 chars
                 return content
     return None
 
-def main():
+# Electron is started with remote debugging enabled so readiness can be
+# detected from the DevTools protocol instead of guessed with timers
+DEVTOOLS_PORT = 9222
+
+def _list_devtools_targets():
+    with urlopen(f'http://127.0.0.1:{DEVTOOLS_PORT}/json', timeout=1) as resp:
+        return json.load(resp)
+
+async def wait_for_renderer(timeout=20, interval=0.25):
+    """Poll the DevTools endpoint until a page target has loaded"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            targets = await asyncio.to_thread(_list_devtools_targets)
+        except OSError:
+            targets = []
+        for target in targets:
+            url = target.get('url', '')
+            if target.get('type') == 'page' and not url.startswith('devtools'):
+                return target
+        await asyncio.sleep(interval)
+    return None
+
+async def drain_output(stream, log_file):
+    """Forward Electron output to the log file as it arrives"""
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        log_file.write(line.decode('utf-8', 'replace'))
+
+async def main():
     print("🚀 Starting Kimi IDE debug session...")
     print("=" * 50)
-    
-    # Clean up previous runs
-    subprocess.run(['pkill', '-f', 'electron'], capture_output=True)
-    time.sleep(1)
-    
-    # Start Electron with logging
+
+    # Clean up previous runs; kill_previous_session waits for the group
+    # to actually exit, so no settle sleep is needed here
+    session.kill_previous_session()
+
+    # Start Electron; its output is drained concurrently so the pipe
+    # never fills up while we're busy waiting or screenshotting.
+    # start_new_session puts npm and the Electron tree it spawns into
+    # their own process group, so one killpg reaches all of them
     print("\n🟢 Starting Electron...")
-    log_file = open('electron_console.log', 'w')
-    
-    process = subprocess.Popen(
-        ['npm', 'start'],
-        stdout=log_file,
-        stderr=subprocess.STDOUT,
-        cwd='/Users/mac/kimi-vscode/ide'
+    # O_APPEND keeps the kernel-direct stderr writes and the drained
+    # stdout lines from clobbering each other; line buffering replaces
+    # the per-line flush in the drain task
+    log_fd = os.open('electron_console.log',
+                     os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o644)
+    log_file = open(log_fd, 'w', buffering=1)
+
+    # Only stdout goes through a pipe; stderr writes straight to the log
+    # file so it isn't copied through Python a second time
+    process = await asyncio.create_subprocess_exec(
+        'npm', 'start', '--', f'--remote-debugging-port={DEVTOOLS_PORT}',
+        stdout=asyncio.subprocess.PIPE,
+        stderr=log_fd,
+        cwd='/Users/mac/kimi-vscode/ide',
+        start_new_session=True
     )
-    
+    drain_task = asyncio.create_task(drain_output(process.stdout, log_file))
+    session.write_pid_file(process.pid)
+
     print(f"PID: {process.pid}")
-    
-    # Take screenshots at intervals
-    time.sleep(3)
-    take_screenshot('03s_startup')
-    check_console_log()
-    
-    time.sleep(5)
-    take_screenshot('08s_loading')
+
+    # Wait for the window instead of fixed sleeps, then grab one frame
+    if await asyncio.to_thread(session.wait_for_window):
+        print("🪟 Window is up")
+    else:
+        print("⚠️ Window not detected within timeout, capturing anyway")
+    take_screenshot('window')
     check_console_log()
-    
-    time.sleep(5)
-    take_screenshot('13s_loaded')
+
+    # Then wait for the renderer page itself - this is the adaptive
+    # equivalent of the old 3s/8s/13s guesses
+    target = await wait_for_renderer()
+    if target:
+        print(f"🧩 Renderer loaded: {target.get('url', '?')}")
+    else:
+        print("⚠️ No DevTools page target within timeout")
+    take_screenshot('renderer')
     check_console_log()
-    
-    # Check if dist files exist
+
+    # Check if dist files exist - one scandir pass instead of a
+    # stat per file
     print("\n📁 Checking dist files:")
-    dist_files = ['dist/main.js', 'dist/renderer.js', 'dist/index.html']
+    dist_files = ['main.js', 'renderer.js', 'index.html']
+    sizes = {}
+    try:
+        with os.scandir('dist') as entries:
+            for entry in entries:
+                if entry.name in dist_files:
+                    sizes[entry.name] = entry.stat().st_size
+    except FileNotFoundError:
+        pass
     for f in dist_files:
-        exists = os.path.exists(f)
-        size = os.path.getsize(f) if exists else 0
-        status = "✅" if exists else "❌"
-        print(f"{status} {f}: {size} bytes")
-    
-    # Check index.html content
+        size = sizes.get(f)
+        status = "✅" if size is not None else "❌"
+        print(f"{status} dist/{f}: {size or 0} bytes")
+
+    # Check index.html content - mmap the file and scan the raw bytes
+    # instead of decoding the whole document into a str
     print("\n📄 Checking index.html:")
-    with open('dist/index.html', 'r') as f:
-        html = f.read()
-        if '<script' in html:
-            print("✅ Script tag found in HTML")
-        else:
-            print("❌ No script tag in HTML!")
-        
-        if 'renderer.js' in html:
-            print("✅ renderer.js referenced")
-        else:
-            print("❌ renderer.js not referenced!")
-    
-    # Keep running for a bit more
-    time.sleep(5)
-    take_screenshot('18s_final')
-    
+    with open('dist/index.html', 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as html:
+            if html.find(b'<script') != -1:
+                print("✅ Script tag found in HTML")
+            else:
+                print("❌ No script tag in HTML!")
+
+            if html.find(b'renderer.js') != -1:
+                print("✅ renderer.js referenced")
+            else:
+                print("❌ renderer.js not referenced!")
+
+    # Grab a final frame
+    take_screenshot('final')
+
     print("\n🔴 Killing Electron...")
-    process.terminate()
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    try:
+        await asyncio.wait_for(process.wait(), timeout=5)
+    except asyncio.TimeoutError:
+        print("⚠️ Electron didn't exit in 5s, sending SIGKILL")
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await process.wait()
+    await drain_task
     log_file.close()
-    
+    session.remove_pid_file()
+
     print("\n✅ Debug session complete!")
     print("📸 Screenshots saved in: debug_screenshots/")
     print("📝 Console log: electron_console.log")
 
 if __name__ == '__main__':
-    main()
+    asyncio.run(main())
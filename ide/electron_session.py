@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Shared Electron session fixture for the debug/capture scripts.
+
+Launching Electron is by far the slowest part of these scripts, so they
+all go through this module: a running session is tracked via a pidfile
+and reused where possible instead of each script paying for its own
+launch, and the window/screenshot helpers live here once.
+"""
+import hashlib
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+
+IDE_DIR = os.path.dirname(os.path.abspath(__file__))
+PID_FILE = os.path.join(IDE_DIR, 'electron_debug.pid')
+
+WINDOW_CHECK_SCRIPT = 'tell application "System Events" to tell process "Electron" to exists window 1'
+WINDOW_BOUNDS_SCRIPT = 'tell application "System Events" to tell process "Electron" to get {position, size} of window 1'
+WINDOW_ID_SCRIPT = 'tell application "System Events" to tell process "Electron" to return id of window 1'
+
+# ScreenCaptureKit helper (see tools/sckit_capture.swift); falls back to
+# the legacy screencapture CLI when the helper hasn't been built
+SCKIT_HELPER = os.environ.get(
+    'SCKIT_CAPTURE',
+    os.path.join(IDE_DIR, 'tools', 'sckit-capture')
+)
+
+# Set to cancel any in-progress wait loops instantly (e.g. on Ctrl-C)
+stop_event = threading.Event()
+
+
+# osascript re-parses '-e' sources on every invocation; compiling each
+# script to a .scpt once (cached on disk across runs) skips that parse
+SCPT_DIR = os.path.join(IDE_DIR, '.scpt_cache')
+_scpt_cache = {}
+
+
+def _compiled_script(script):
+    """Compile the AppleScript once, returning the .scpt path or None"""
+    if script in _scpt_cache:
+        return _scpt_cache[script]
+    digest = hashlib.sha1(script.encode()).hexdigest()[:12]
+    path = os.path.join(SCPT_DIR, f'{digest}.scpt')
+    if not os.path.exists(path):
+        os.makedirs(SCPT_DIR, exist_ok=True)
+        result = subprocess.run(
+            ['osacompile', '-e', script, '-o', path],
+            capture_output=True
+        )
+        if result.returncode != 0:
+            path = None
+    _scpt_cache[script] = path
+    return path
+
+
+def _osascript(script):
+    compiled = _compiled_script(script)
+    if compiled:
+        return subprocess.run(
+            ['osascript', compiled],
+            capture_output=True, text=True
+        )
+    return subprocess.run(
+        ['osascript', '-e', script],
+        capture_output=True, text=True
+    )
+
+
+def window_exists():
+    """True if the Electron window is currently up"""
+    result = _osascript(WINDOW_CHECK_SCRIPT)
+    return result.returncode == 0 and result.stdout.strip() == 'true'
+
+
+def wait_for_window(timeout=15, interval=0.2):
+    """Poll until the Electron window exists, returning as soon as it appears"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not stop_event.is_set():
+        if window_exists():
+            return True
+        stop_event.wait(interval)
+    return False
+
+
+# The window doesn't move between screenshots in a debug run, so query
+# its bounds once and reuse them for every subsequent frame
+_window_bounds = None
+
+# osascript prints "{x, y}, {w, h}" flattened as "x, y, w, h", with the
+# exact separators varying by macOS version; match the numbers directly
+_BOUNDS_RE = re.compile(r'(-?\d+)\D+(-?\d+)\D+(-?\d+)\D+(-?\d+)')
+
+
+def get_window_bounds(refresh=False):
+    """Return (x, y, w, h) of the Electron window, or None (cached)"""
+    global _window_bounds
+    if _window_bounds is not None and not refresh:
+        return _window_bounds
+    result = _osascript(WINDOW_BOUNDS_SCRIPT)
+    if result.returncode != 0:
+        return None
+    match = _BOUNDS_RE.search(result.stdout)
+    if not match:
+        return None
+    _window_bounds = tuple(int(g) for g in match.groups())
+    return _window_bounds
+
+
+def get_window_id():
+    """Return the Electron window id as a string, or None"""
+    result = _osascript(WINDOW_ID_SCRIPT)
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+# Long-lived SCKit helper in --serve mode; one process launch per
+# session instead of one fork per frame
+_helper_proc = None
+
+
+def _helper_capture(filename):
+    """Stream a capture request to the persistent SCKit helper"""
+    global _helper_proc
+    if _helper_proc is None or _helper_proc.poll() is not None:
+        _helper_proc = subprocess.Popen(
+            [SCKIT_HELPER, '--serve'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+    _helper_proc.stdin.write(filename.encode() + b'\n')
+    _helper_proc.stdin.flush()
+    reply = _helper_proc.stdout.readline()
+    return reply.startswith(b'ok')
+
+
+def capture_frame(filename, region=None):
+    """Capture one frame, preferring the ScreenCaptureKit helper.
+
+    When region (x, y, w, h) is given, only that rect is captured, so the
+    encoder works on a window-sized buffer instead of the whole display.
+    The image format follows the filename extension (jpg frames are
+    roughly a tenth the size of png for full-window UI captures).
+    """
+    fmt = os.path.splitext(filename)[1].lstrip('.').lower() or 'png'
+    # The SCKit helper only emits PNG
+    if fmt == 'png' and os.path.exists(SCKIT_HELPER):
+        if _helper_capture(filename):
+            return
+    cmd = ['screencapture', '-x', '-t', fmt]
+    if region:
+        cmd += ['-R', '%d,%d,%d,%d' % region]
+    subprocess.run(cmd + [filename])
+
+
+def read_pid_file():
+    """Return the recorded session pgid, or None"""
+    try:
+        with open(PID_FILE) as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_pid_file(pid):
+    with open(PID_FILE, 'w') as f:
+        f.write(str(pid))
+
+
+def remove_pid_file():
+    try:
+        os.unlink(PID_FILE)
+    except FileNotFoundError:
+        pass
+
+
+def wait_for_exit(pgid, timeout=5, interval=0.05):
+    """Wait until no process in the group remains.
+
+    The group belongs to a previous script run, not to us, so SIGCHLD /
+    waitpid don't apply; probing with signal 0 is the portable check.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not stop_event.is_set():
+        try:
+            os.killpg(pgid, 0)
+        except ProcessLookupError:
+            return True
+        stop_event.wait(interval)
+    return False
+
+
+def kill_previous_session():
+    """Kill the process group recorded by the previous run, if any"""
+    pgid = read_pid_file()
+    if pgid is None:
+        return False
+    remove_pid_file()
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+    except ProcessLookupError:
+        return False
+    print(f"🧹 Killed leftover session (pgid {pgid})")
+    if not wait_for_exit(pgid):
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    return True
+
+
+def launch(args=None, cwd=IDE_DIR, stdout=None, stderr=None):
+    """Start Electron in its own process group and record its pgid"""
+    proc = subprocess.Popen(
+        args or ['./node_modules/.bin/electron', '.'],
+        cwd=cwd, stdout=stdout, stderr=stderr,
+        start_new_session=True
+    )
+    write_pid_file(proc.pid)
+    return proc
+
+
+def attach_or_launch(**kwargs):
+    """Reuse the running session when its window is up, else launch.
+
+    Returns the new process, or None when attached to an existing one
+    (in which case the caller must not shut the session down).
+    """
+    if read_pid_file() is not None and window_exists():
+        print("♻️ Reusing running Electron session")
+        return None
+    return launch(**kwargs)
+
+
+def shutdown(proc, timeout=5):
+    """SIGTERM the session's process group, bounded wait, then SIGKILL"""
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.wait()
+    remove_pid_file()
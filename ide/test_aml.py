@@ -3,9 +3,72 @@
 AML Widget Tester - Renders AML to HTML for quick testing
 """
 
+import html
+import io
+import os
 import re
 import sys
-from html import escape
+from functools import lru_cache, partial
+
+# Single-pass replacement table equivalent to html.escape(quote=True);
+# str.translate does one C-level scan instead of five .replace passes
+_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;',
+})
+_NEEDS_ESCAPE_RE = re.compile(r'[&<>"\']')
+
+
+def escape(s: str) -> str:
+    # Most inline content has nothing to escape; one regex scan decides
+    # whether the translate pass (and its copy) is needed at all
+    if _NEEDS_ESCAPE_RE.search(s) is None:
+        return s
+    return s.translate(_ESCAPE_TABLE)
+
+
+def _stdlib_escape(s: str) -> str:
+    if _NEEDS_ESCAPE_RE.search(s) is None:
+        return s
+    return html.escape(s)
+
+
+def _autotune_escape():
+    """Bind the fastest escape variant for this interpreter.
+
+    Which strategy wins varies by CPython version, so with AML_AUTOTUNE
+    set, a tiny timeit race picks between str.translate and html.escape
+    (both emit identical markup, including &#x27; for quotes). The
+    winner is cached per version/arch so the race runs once per host.
+    """
+    import json
+    import platform
+    import timeit
+
+    cache_path = os.path.expanduser('~/.cache/kimi-aml-tune.json')
+    key = f'{sys.version_info.major}.{sys.version_info.minor}-{platform.machine()}'
+    candidates = {'translate': escape, 'stdlib': _stdlib_escape}
+    try:
+        with open(cache_path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = {}
+    name = cached.get(key)
+    if name not in candidates:
+        sample = '<strong>Hello</strong>' * 50
+        name = min(candidates,
+                   key=lambda n: timeit.Timer(lambda: candidates[n](sample)).timeit(1000))
+        cached[key] = name
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump(cached, f)
+        except OSError:
+            pass
+    return candidates[name]
+
+
+if os.environ.get('AML_AUTOTUNE'):
+    escape = _autotune_escape()
 
 # Color palette from IDE
 COLORS = {
@@ -451,11 +514,31 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
 </html>'''
 
 
+# COLORS never changes at runtime, so resolve the template's color slots
+# once at import with a NUL sentinel standing in for {content}; per-render
+# work is then just two literal chunks concatenated (C-level memcpy)
+# around the rendered body - no format parser, no replace scan
+_PAGE_PREFIX, _PAGE_SUFFIX = HTML_TEMPLATE.format(**COLORS, content='\0').split('\0', 1)
+
+
+# Per-renderer patterns, compiled once at import
+_ATTR_RE = re.compile(r'([\w-]+)=["\']([^"\']*)["\']')
+_ITEM_RE = re.compile(r'<trait:item[^>]*>(.*?)</trait:item>', re.DOTALL)
+_TODO_ITEM_RE = re.compile(r'<trait:item\s+done="([^"]*)"[^>]*>(.*?)</trait:item>', re.DOTALL)
+_HEADER_ROW_RE = re.compile(r'<trait:row\s+header="true"[^>]*>(.*?)</trait:row>', re.DOTALL)
+_ROW_RE = re.compile(r'<trait:row[^>]*>(.*?)</trait:row>', re.DOTALL)
+_CELL_RE = re.compile(r'<trait:cell[^>]*>(.*?)</trait:cell>', re.DOTALL)
+_DATA_RE = re.compile(r'<trait:data\s+label="([^"]*)"\s+value="([^"]*)"[^/]*/>')
+_COMMAND_RE = re.compile(r'<trait:command[^>]*>(.*?)</trait:command>', re.DOTALL)
+_OUTPUT_RE = re.compile(r'<trait:output\s+type="([^"]*)"[^>]*>(.*?)</trait:output>', re.DOTALL)
+_BREADCRUMB_TAG_RE = re.compile(r'<trait:tag[^>]*>(.*?)</trait:tag>')
+
+
 def parse_attrs(attr_str: str) -> dict:
     """Parse XML attributes"""
     attrs = {}
     # Match attr="value" or attr='value'
-    for match in re.finditer(r'([\w-]+)=["\']([^"\']*)["\']', attr_str):
+    for match in _ATTR_RE.finditer(attr_str):
         attrs[match.group(1)] = match.group(2)
     return attrs
 
@@ -465,64 +548,85 @@ def render_button(attrs: dict, content: str) -> str:
 
 
 def render_code(attrs: dict, content: str) -> str:
-    file_attr = f'<span class="trait-code-file">{attrs.get("file", "")}</span>' if "file" in attrs else ""
-    lang_attr = f'<span class="trait-code-lang">{attrs.get("language", "")}</span>' if "language" in attrs else ""
+    file_ = attrs.get("file")
+    language = attrs.get("language")
+    file_attr = f'<span class="trait-code-file">{file_}</span>' if file_ is not None else ""
+    lang_attr = f'<span class="trait-code-lang">{language}</span>' if language is not None else ""
     return f'''<div class="trait-code-block">
     <div class="trait-code-header">{file_attr}{lang_attr}</div>
     <pre class="trait-code">{escape(content)}</pre>
 </div>'''
 
 
-def render_coderef(attrs: dict) -> str:
-    text = attrs.get("text", attrs.get("path", ""))
+def render_coderef(attrs: dict, content: str) -> str:
+    text = attrs.get("text")
+    if text is None:
+        text = attrs.get("path", "")
     return f'<code class="trait-coderef">{escape(text)}</code>'
 
 
+# First-character classification: (extra css class, marker, chars to strip)
+_DIFF_LINE_KINDS = {
+    '+': (' trait-diff-added', '+', 1),
+    '-': (' trait-diff-removed', '-', 1),
+}
+_DIFF_LINE_DEFAULT = ('', ' ', 0)
+
+
 def render_diff(attrs: dict, content: str) -> str:
-    lines = content.strip().split('\n')
     lines_html = []
-    for line in lines:
-        if line.startswith('+'):
-            lines_html.append(f'<div class="trait-diff-line trait-diff-added"><span class="trait-diff-marker">+</span><span class="trait-diff-text">{escape(line[1:])}</span></div>')
-        elif line.startswith('-'):
-            lines_html.append(f'<div class="trait-diff-line trait-diff-removed"><span class="trait-diff-marker">-</span><span class="trait-diff-text">{escape(line[1:])}</span></div>')
-        else:
-            lines_html.append(f'<div class="trait-diff-line"><span class="trait-diff-marker"> </span><span class="trait-diff-text">{escape(line)}</span></div>')
-    
-    header = f'<div class="trait-diff-header">{attrs.get("file", "")}</div>' if "file" in attrs else ""
+    append = lines_html.append
+    for line in content.strip().split('\n'):
+        cls, marker, skip = _DIFF_LINE_KINDS.get(line[:1], _DIFF_LINE_DEFAULT)
+        append('<div class="trait-diff-line' + cls + '"><span class="trait-diff-marker">' + marker
+               + '</span><span class="trait-diff-text">' + escape(line[skip:]) + '</span></div>')
+
+    file_ = attrs.get("file")
+    header = f'<div class="trait-diff-header">{file_}</div>' if file_ is not None else ""
     return f'<div class="trait-diff">{header}<div class="trait-diff-content">{ "".join(lines_html) }</div></div>'
 
 
-def render_file(attrs: dict) -> str:
-    name = attrs.get("name", attrs.get("path", "").split('/')[-1])
-    line = f':{attrs["line"]}' if "line" in attrs else ""
+def render_file(attrs: dict, content: str) -> str:
+    name = attrs.get("name")
+    if name is None:
+        name = attrs.get("path", "").split('/')[-1]
+    line_no = attrs.get("line")
+    line = f':{line_no}' if line_no is not None else ""
     return f'<span class="trait-file">/{escape(name)}{line}</span>'
 
 
 def render_list(attrs: dict, content: str) -> str:
-    items = re.findall(r'<trait:item[^>]*>(.*?)</trait:item>', content, re.DOTALL)
-    items_html = ''.join([f'<li class="trait-item">{escape(item.strip())}</li>' for item in items])
+    parts = []
+    append = parts.append
+    for m in _ITEM_RE.finditer(content):
+        append('<li class="trait-item">' + escape(m.group(1).strip()) + '</li>')
     tag = 'ol' if attrs.get('ordered') == 'true' else 'ul'
-    return f'<{tag} class="trait-list">{items_html}</{tag}>'
+    return f'<{tag} class="trait-list">{"".join(parts)}</{tag}>'
 
 
 def render_todo(attrs: dict, content: str) -> str:
-    items = re.findall(r'<trait:item\s+done="([^"]*)"[^>]*>(.*?)</trait:item>', content, re.DOTALL)
-    items_html = ''.join([
-        f'<li class="trait-todo-item {"trait-todo-done" if done == "true" else ""}"><input type="checkbox" {"checked" if done == "true" else ""} disabled> <span>{escape(text.strip())}</span></li>'
-        for done, text in items
-    ])
-    title = f'<div class="trait-todo-header">{attrs.get("title", "Tasks")}</div>' if "title" in attrs else ""
-    return f'<div class="trait-todo">{title}<ul class="trait-todo-list">{items_html}</ul></div>'
+    parts = []
+    append = parts.append
+    for m in _TODO_ITEM_RE.finditer(content):
+        done, text = m.groups()
+        is_done = done == "true"
+        append('<li class="trait-todo-item ' + ("trait-todo-done" if is_done else "")
+               + '"><input type="checkbox" ' + ("checked" if is_done else "")
+               + ' disabled> <span>' + escape(text.strip()) + '</span></li>')
+    title_attr = attrs.get("title")
+    title = f'<div class="trait-todo-header">{title_attr}</div>' if title_attr is not None else ""
+    return f'<div class="trait-todo">{title}<ul class="trait-todo-list">{"".join(parts)}</ul></div>'
 
 
 def render_table(attrs: dict, content: str) -> str:
-    rows = re.findall(r'<trait:row\s+header="true"[^>]*>(.*?)</trait:row>', content, re.DOTALL)
-    data_rows = re.findall(r'<trait:row[^>]*>(.*?)</trait:row>', content, re.DOTALL)
+    rows = _HEADER_ROW_RE.findall(content)
+    data_rows = _ROW_RE.findall(content)
     
     def render_cells(row_content: str) -> str:
-        cells = re.findall(r'<trait:cell[^>]*>(.*?)</trait:cell>', row_content, re.DOTALL)
-        return ''.join([f'<td class="trait-cell">{escape(cell.strip())}</td>' for cell in cells])
+        return ''.join(
+            '<td class="trait-cell">' + escape(m.group(1).strip()) + '</td>'
+            for m in _CELL_RE.finditer(row_content)
+        )
     
     header_html = ''
     if rows:
@@ -541,10 +645,12 @@ def render_tag(attrs: dict, content: str) -> str:
     return f'<span class="trait-tag">{escape(content)}</span>'
 
 
-def render_progress(attrs: dict) -> str:
+def render_progress(attrs: dict, content: str) -> str:
     value = int(attrs.get("value", 0))
     max_val = int(attrs.get("max", 100))
-    pct = min(100, max(0, (value / max_val) * 100))
+    # Clamp with pure int arithmetic: no float division, and the width
+    # renders as a whole percent
+    pct = 0 if value <= 0 else 100 if value >= max_val else (value * 100) // max_val
     label = attrs.get("label", f"{value}/{max_val}")
     return f'''<div class="trait-progress">
     <div class="trait-progress-label"><span>{label}</span><span>{value}/{max_val}</span></div>
@@ -552,7 +658,7 @@ def render_progress(attrs: dict) -> str:
 </div>'''
 
 
-def render_metric(attrs: dict) -> str:
+def render_metric(attrs: dict, content: str) -> str:
     return f'''<div class="trait-metric">
     <div class="trait-metric-value">{attrs.get("value", "")}</div>
     <div class="trait-metric-label">{attrs.get("label", "")}</div>
@@ -560,57 +666,84 @@ def render_metric(attrs: dict) -> str:
 
 
 def render_chart(attrs: dict, content: str) -> str:
-    data_points = re.findall(r'<trait:data\s+label="([^"]*)"\s+value="([^"]*)"[^/]*/>', content)
-    max_val = max([int(v) for _, v in data_points], default=1)
+    # Parse values once; both the max scan and the bar loop reuse them
+    points = [(m.group(1), int(m.group(2))) for m in _DATA_RE.finditer(content)]
+    max_val = max((v for _, v in points), default=1)
     bars_html = ''.join([
-        f'<div class="trait-chart-bar" style="height: {max(10, (int(v)/max_val)*80)}%"><div class="trait-chart-bar-value">{v}</div><div class="trait-chart-bar-label">{l}</div></div>'
-        for l, v in data_points
+        f'<div class="trait-chart-bar" style="height: {max(10, (v * 80) // max_val)}%"><div class="trait-chart-bar-value">{v}</div><div class="trait-chart-bar-label">{l}</div></div>'
+        for l, v in points
     ])
-    title = f'<div class="trait-chart-title">{attrs.get("title", "")}</div>' if "title" in attrs else ""
+    title_attr = attrs.get("title")
+    title = f'<div class="trait-chart-title">{title_attr}</div>' if title_attr is not None else ""
     return f'<div class="trait-chart">{title}<div class="trait-chart-content">{bars_html}</div></div>'
 
 
 def render_terminal(attrs: dict, content: str) -> str:
-    commands = re.findall(r'<trait:command[^>]*>(.*?)</trait:command>', content, re.DOTALL)
-    outputs = re.findall(r'<trait:output\s+type="([^"]*)"[^>]*>(.*?)</trait:output>', content, re.DOTALL)
-    
-    cmd_html = ''.join([f'<div class="trait-command">{escape(cmd.strip())}</div>' for cmd in commands])
-    out_html = ''.join([f'<div class="trait-output trait-output-{t}">{escape(o.strip())}</div>' for t, o in outputs])
+    cmd_html = ''.join(
+        '<div class="trait-command">' + escape(m.group(1).strip()) + '</div>'
+        for m in _COMMAND_RE.finditer(content)
+    )
+    out_html = ''.join(
+        '<div class="trait-output trait-output-' + m.group(1) + '">' + escape(m.group(2).strip()) + '</div>'
+        for m in _OUTPUT_RE.finditer(content)
+    )
     
     title = attrs.get("title", "Terminal")
     return f'<div class="trait-terminal"><div class="trait-terminal-header"><span class="trait-terminal-title">{title}</span></div><div class="trait-terminal-content">{cmd_html}{out_html}</div></div>'
 
 
-def render_alert(type_: str, content: str) -> str:
-    icons = {'info': 'ℹ', 'warning': '⚠', 'error': '✕', 'success': '✓', 'tip': '💡'}
-    return f'<div class="trait-alert trait-alert-{type_}"><span class="trait-alert-icon">{icons.get(type_, "ℹ")}</span><span>{escape(content.strip())}</span></div>'
+_ALERT_ICONS = {'info': 'ℹ', 'warning': '⚠', 'error': '✕', 'success': '✓', 'tip': '💡'}
+
+# Opening markup fully assembled per alert type; only the escaped body
+# is concatenated at render time
+_ALERT_PREFIX = {
+    type_: f'<div class="trait-alert trait-alert-{type_}"><span class="trait-alert-icon">{icon}</span><span>'
+    for type_, icon in _ALERT_ICONS.items()
+}
+
+
+def render_alert(type_: str, attrs: dict, content: str) -> str:
+    return _ALERT_PREFIX[type_] + escape(content.strip()) + '</span></div>'
+
+
+def _render_children(content: str) -> str:
+    """Render nested AML, skipping the parser for whitespace-only bodies.
+
+    Shared child fragments hit the render_aml memo cache, so a container
+    wrapping an already-rendered subtree costs one dict lookup rather
+    than a second full parse.
+    """
+    if not content or content.isspace():
+        return ''
+    return render_aml(content)
 
 
 def render_card(attrs: dict, content: str) -> str:
-    title = f'<div class="trait-card-title">{escape(attrs.get("title", ""))}</div>' if "title" in attrs else ""
-    inner = render_aml(content)
+    title_attr = attrs.get("title")
+    title = f'<div class="trait-card-title">{escape(title_attr)}</div>' if title_attr is not None else ""
+    inner = _render_children(content)
     return f'<div class="trait-card">{title}<div class="trait-card-content">{inner}</div></div>'
 
 
 def render_grid(attrs: dict, content: str) -> str:
     cols = attrs.get("cols", "3")
-    children = render_aml(content)
+    children = _render_children(content)
     return f'<div class="trait-grid" style="grid-template-columns: repeat({cols}, 1fr);">{children}</div>'
 
 
 def render_filetree(attrs: dict, content: str) -> str:
     root = attrs.get("root", "Files")
-    inner = render_aml(content)
+    inner = _render_children(content)
     return f'<div class="trait-filetree"><div class="trait-filetree-header">{root}</div>{inner}</div>'
 
 
 def render_folder(attrs: dict, content: str) -> str:
     name = attrs.get("name", "folder")
-    inner = render_aml(content)
+    inner = _render_children(content)
     return f'<div class="trait-folder"><div class="trait-folder-header">▼ {escape(name)}</div><div class="trait-folder-children">{inner}</div></div>'
 
 
-def render_search(attrs: dict) -> str:
+def render_search(attrs: dict, content: str) -> str:
     query = attrs.get("query", "")
     results = attrs.get("results", "")
     res_html = f'<span class="trait-search-results">{results}</span>' if results else ""
@@ -618,26 +751,26 @@ def render_search(attrs: dict) -> str:
 
 
 def render_breadcrumb(attrs: dict, content: str) -> str:
-    tags = re.findall(r'<trait:tag[^>]*>(.*?)</trait:tag>', content)
+    tags = _BREADCRUMB_TAG_RE.findall(content)
     items = [f'<span class="trait-tag">{escape(t)}</span>' for t in tags]
     sep = '<span class="trait-breadcrumb-separator">/</span>'
     return f'<div class="trait-breadcrumb">{sep.join(items)}</div>'
 
 
-def render_divider() -> str:
+def render_divider(attrs: dict, content: str) -> str:
     return '<hr class="trait-divider">'
 
 
-def render_spacer(attrs: dict) -> str:
+def render_spacer(attrs: dict, content: str) -> str:
     size = attrs.get("size", "12px")
     return f'<div style="height: {size}"></div>'
 
 
-def render_br() -> str:
+def render_br(attrs: dict, content: str) -> str:
     return '<br>'
 
 
-def render_timestamp(attrs: dict) -> str:
+def render_timestamp(attrs: dict, content: str) -> str:
     return f'<span class="trait-timestamp">{attrs.get("value", "")}</span>'
 
 
@@ -645,105 +778,158 @@ def render_link(attrs: dict, content: str) -> str:
     return f'<span class="trait-link">{escape(content)}</span>'
 
 
+# Dispatch table built once at import: plain function references, no
+# per-call dict construction or lambda indirection
+def render_item(attrs: dict, content: str) -> str:
+    return escape(content)
+
+
+_RENDERERS = {
+    'trait:button': render_button,
+    'trait:code': render_code,
+    'trait:coderef': render_coderef,
+    'trait:diff': render_diff,
+    'trait:file': render_file,
+    'trait:list': render_list,
+    'trait:todo': render_todo,
+    'trait:table': render_table,
+    'trait:badge': render_badge,
+    'trait:tag': render_tag,
+    'trait:progress': render_progress,
+    'trait:metric': render_metric,
+    'trait:chart': render_chart,
+    'trait:barchart': render_chart,
+    'trait:terminal': render_terminal,
+    'trait:info': partial(render_alert, 'info'),
+    'trait:warning': partial(render_alert, 'warning'),
+    'trait:error': partial(render_alert, 'error'),
+    'trait:success': partial(render_alert, 'success'),
+    'trait:tip': partial(render_alert, 'tip'),
+    'trait:card': render_card,
+    'trait:grid': render_grid,
+    'trait:divider': render_divider,
+    'trait:spacer': render_spacer,
+    'trait:br': render_br,
+    'trait:filetree': render_filetree,
+    'trait:folder': render_folder,
+    'trait:search': render_search,
+    'trait:breadcrumb': render_breadcrumb,
+    'trait:timestamp': render_timestamp,
+    'trait:link': render_link,
+    'trait:item': render_item,  # Fallback for items outside a list
+}
+
+_UNKNOWN_FMT = '<span style="color: #d95555;">Unknown: %s</span>'
+
+
 def render_widget(tag_name: str, attrs: dict, content: str) -> str:
     """Render a single widget"""
-    renderers = {
-        'trait:button': lambda a, c: render_button(a, c),
-        'trait:code': lambda a, c: render_code(a, c),
-        'trait:coderef': lambda a, c: render_coderef(a),
-        'trait:diff': lambda a, c: render_diff(a, c),
-        'trait:file': lambda a, c: render_file(a),
-        'trait:list': lambda a, c: render_list(a, c),
-        'trait:todo': lambda a, c: render_todo(a, c),
-        'trait:table': lambda a, c: render_table(a, c),
-        'trait:badge': lambda a, c: render_badge(a, c),
-        'trait:tag': lambda a, c: render_tag(a, c),
-        'trait:progress': lambda a, c: render_progress(a),
-        'trait:metric': lambda a, c: render_metric(a),
-        'trait:chart': lambda a, c: render_chart(a, c),
-        'trait:barchart': lambda a, c: render_chart(a, c),
-        'trait:terminal': lambda a, c: render_terminal(a, c),
-        'trait:info': lambda a, c: render_alert('info', c),
-        'trait:warning': lambda a, c: render_alert('warning', c),
-        'trait:error': lambda a, c: render_alert('error', c),
-        'trait:success': lambda a, c: render_alert('success', c),
-        'trait:tip': lambda a, c: render_alert('tip', c),
-        'trait:card': lambda a, c: render_card(a, c),
-        'trait:grid': lambda a, c: render_grid(a, c),
-        'trait:divider': lambda a, c: render_divider(),
-        'trait:spacer': lambda a, c: render_spacer(a),
-        'trait:br': lambda a, c: render_br(),
-        'trait:filetree': lambda a, c: render_filetree(a, c),
-        'trait:folder': lambda a, c: render_folder(a, c),
-        'trait:search': lambda a, c: render_search(a),
-        'trait:breadcrumb': lambda a, c: render_breadcrumb(a, c),
-        'trait:timestamp': lambda a, c: render_timestamp(a),
-        'trait:link': lambda a, c: render_link(a, c),
-        'trait:item': lambda a, c: escape(c),  # Fallback
-    }
-    
-    renderer = renderers.get(tag_name)
-    if renderer:
-        return renderer(attrs, content)
-    return f'<span style="color: #d95555;">Unknown: {tag_name}</span>'
+    renderer = _RENDERERS.get(tag_name)
+    return renderer(attrs, content) if renderer else _UNKNOWN_FMT % tag_name
+
+
+# One compiled tokenizer for the whole render loop, matching open and
+# close tags alike so the document is scanned exactly once. An XML/SAX
+# parse (expat) doesn't fit here: widget payloads such as code, diff and
+# terminal bodies carry raw '<' and '&', so AML is not well-formed XML.
+_TAG_RE = re.compile(r'<(/?)(trait:[a-z]+)([^>]*)>', re.IGNORECASE)
+
+
+def render_aml_to(write, content: str) -> None:
+    """Render AML content, streaming HTML fragments to a write callable.
+
+    write can be a file's write, sys.stdout.write or a StringIO's write;
+    nothing larger than one widget's HTML is held in memory here.
+    """
+    # Fast path: plain text never reaches the tokenizer at all; a
+    # substring scan is far cheaper than even one regex search
+    if '<trait:' not in content.lower():
+        text = content.strip()
+        if text:
+            write(f'<div class="trait-text-content"><p>{escape(text)}</p></div>')
+        return
+
+    # Tokenize once up front; matching an open tag to its close is then
+    # a walk over this list instead of a fresh scan of the text
+    tokens = _TAG_RE.finditer(content)
+    tokens = list(tokens)
+    n = len(tokens)
+    pos = 0
+    i = 0
+    # One dict lookup per widget, straight to the pre-bound renderer
+    dispatch = _RENDERERS.get
+
+    while i < n:
+        match = tokens[i]
+        closing, tag_name, attrs_str = match.groups()
+
+        if closing:
+            # Stray close tag with no matching open: leave it inside the
+            # surrounding text run
+            i += 1
+            continue
 
+        tag_start = match.start()
+        tag_end = match.end()
+        tag_name = tag_name.lower()
 
-def render_aml(content: str) -> str:
-    """Render AML content to HTML"""
-    result = []
-    pos = 0
-    
-    while pos < len(content):
-        # Find next tag
-        match = re.search(r'<(trait:[a-z]+)([^>]*)>', content[pos:], re.IGNORECASE)
-        if not match:
-            # Remaining text
-            text = content[pos:].strip()
-            if text:
-                result.append(f'<div class="trait-text-content"><p>{escape(text)}</p></div>')
-            break
-        
-        tag_start = pos + match.start()
-        tag_name = match.group(1).lower()
-        attrs_str = match.group(2)
-        
         # Add text before tag
         if tag_start > pos:
             text = content[pos:tag_start].strip()
             if text:
-                result.append(f'<div class="trait-text-content"><p>{escape(text)}</p></div>')
-        
+                write(f'<div class="trait-text-content"><p>{escape(text)}</p></div>')
+
         # Check if self-closing
-        if attrs_str.endswith('/') or content[tag_start + len(match.group(0)) - 1] == '/':
+        if attrs_str.endswith('/'):
             # Self-closing
-            attrs = parse_attrs(attrs_str)
-            result.append(render_widget(tag_name, attrs, ''))
-            pos = tag_start + len(match.group(0))
+            renderer = dispatch(tag_name)
+            write(renderer(parse_attrs(attrs_str), '') if renderer
+                  else _UNKNOWN_FMT % tag_name)
+            pos = tag_end
+            i += 1
             continue
-        
-        # Find closing tag
-        close_tag = f'</{tag_name}>'
-        close_pos = content.lower().find(close_tag, tag_start + len(match.group(0)))
-        
-        if close_pos == -1:
+
+        # Find the closing tag among the remaining tokens
+        j = i + 1
+        while j < n:
+            m = tokens[j]
+            if m.group(1) and m.group(2).lower() == tag_name:
+                break
+            j += 1
+
+        if j == n:
             # No closing tag - treat as text
-            result.append(escape(match.group(0)))
-            pos = tag_start + len(match.group(0))
+            write(escape(match.group(0)))
+            pos = tag_end
+            i += 1
             continue
-        
+
+        close = tokens[j]
+
         # Extract content
-        inner_start = tag_start + len(match.group(0))
-        inner_content = content[inner_start:close_pos]
-        
-        # Parse attributes
-        attrs = parse_attrs(attrs_str)
-        
+        inner_content = content[tag_end:close.start()]
+
         # Render widget
-        result.append(render_widget(tag_name, attrs, inner_content))
-        
-        pos = close_pos + len(close_tag)
-    
-    return ''.join(result)
+        renderer = dispatch(tag_name)
+        write(renderer(parse_attrs(attrs_str), inner_content) if renderer
+              else _UNKNOWN_FMT % tag_name)
+
+        pos = close.end()
+        i = j + 1
+
+    # Remaining text
+    if pos < len(content):
+        text = content[pos:].strip()
+        if text:
+            write(f'<div class="trait-text-content"><p>{escape(text)}</p></div>')
+
+
+@lru_cache(maxsize=128)
+def render_aml(content: str) -> str:
+    """Render AML content to HTML"""
+    buf = io.StringIO()
+    render_aml_to(buf.write, content)
+    return buf.getvalue()
 
 
 def main():
@@ -824,12 +1010,12 @@ app.whenReady().then(() => {
         # Use test case
         aml_input = test_cases[2]  # Help response
     
-    html_content = render_aml(aml_input)
-    full_html = HTML_TEMPLATE.format(**COLORS, content=html_content)
-    
     output_path = '/Users/mac/kimi-vscode/ide/aml_test_output.html'
+    # Stream straight to the file: the full page never exists in memory
     with open(output_path, 'w') as f:
-        f.write(full_html)
+        f.write(_PAGE_PREFIX)
+        render_aml_to(f.write, aml_input)
+        f.write(_PAGE_SUFFIX)
     
     print(f"Rendered to: {output_path}")
     print(f"Open in browser: file://{output_path}")
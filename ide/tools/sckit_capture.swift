@@ -0,0 +1,67 @@
+// Single-frame screen grab via ScreenCaptureKit.
+//
+// The legacy `screencapture` CLI goes through CGDisplayCreateImage, which is
+// not meant for repeated captures and stalls WindowServer when hammered.
+// This helper uses the modern capture path instead.
+//
+// Build:  swiftc -O -o sckit-capture sckit_capture.swift
+// Usage:  sckit-capture /path/to/output.png
+//         sckit-capture --serve      (read one output path per stdin line;
+//                                     answers "ok"/"err ..." per frame, so a
+//                                     debug run pays one process launch total)
+
+import AppKit
+import ScreenCaptureKit
+
+@main
+struct SCKitCapture {
+    static func capture(to outputPath: String) async throws {
+        let content = try await SCShareableContent.current
+        guard let display = content.displays.first else {
+            throw NSError(domain: "sckit-capture", code: 1,
+                          userInfo: [NSLocalizedDescriptionKey: "no display found"])
+        }
+
+        let filter = SCContentFilter(display: display, excludingWindows: [])
+        let config = SCStreamConfiguration()
+        config.width = display.width
+        config.height = display.height
+
+        let image = try await SCScreenshotManager.captureImage(
+            contentFilter: filter, configuration: config)
+
+        let rep = NSBitmapImageRep(cgImage: image)
+        guard let png = rep.representation(using: .png, properties: [:]) else {
+            throw NSError(domain: "sckit-capture", code: 2,
+                          userInfo: [NSLocalizedDescriptionKey: "PNG encode failed"])
+        }
+        try png.write(to: URL(fileURLWithPath: outputPath))
+    }
+
+    static func main() async {
+        guard CommandLine.arguments.count == 2 else {
+            FileHandle.standardError.write(Data("usage: sckit-capture <output.png> | --serve\n".utf8))
+            exit(64)
+        }
+        let arg = CommandLine.arguments[1]
+
+        if arg == "--serve" {
+            while let line = readLine(strippingNewline: true) {
+                do {
+                    try await capture(to: line)
+                    FileHandle.standardOutput.write(Data("ok\n".utf8))
+                } catch {
+                    FileHandle.standardOutput.write(Data("err \(error.localizedDescription)\n".utf8))
+                }
+            }
+            return
+        }
+
+        do {
+            try await capture(to: arg)
+        } catch {
+            FileHandle.standardError.write(Data("capture failed: \(error)\n".utf8))
+            exit(1)
+        }
+    }
+}